@@ -1,20 +1,31 @@
 # app/api/v1.py
-import os
-import tempfile
-from typing import List
+import asyncio
+import json
+import random
+from typing import List, Literal, Optional, Tuple
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from ..core.config import settings
 from ..services import pdf as pdfsvc
+from ..services import extractive, store
 from ..models.schemas import (
     StudyResponse,
     SummaryResponse,
     FeedbackRequest,
     FeedbackResponse,
+    FeedbackBatchRequest,
+    FeedbackBatchResponse,
+    QuizResponse,
 )
-from ..services.quiz import generate_quiz_with_gemini
-from ..services.feedback import generate_feedback_with_gemini
+from ..services.quiz import generate_quiz_with_gemini, stream_quiz_with_gemini
+from ..services.feedback import (
+    generate_feedback_with_gemini,
+    generate_feedback_batch_with_gemini,
+)
+from ..services.question_bank import get_or_build_bank, sample_quiz
+from ..utils.http_cache import cached_json_response
 
 router = APIRouter(prefix="/api/v1")
 summarizer = None  # injected by main.py
@@ -33,56 +44,189 @@ def _http_map_provider_error(prefix: str, exc: Exception) -> None:
     raise HTTPException(status_code=502, detail=f"{prefix}: {msg}")
 
 
-# ------------------------------ Routes ---------------------------------------
-@router.get("/health")
-def health():
-    return {"status": "ok"}
-
-
-@router.post("/summarize", response_model=SummaryResponse)
-async def summarize_pdf(file: UploadFile = File(...)):
+async def _read_pdf_upload(file: UploadFile) -> Tuple[bytes, int]:
+    """Read the upload; returns (bytes, page count)."""
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Please upload a PDF file")
+    data = await file.read()
+
+    # Cheap size checks before any text extraction
+    if len(data) > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"Upload exceeds {settings.MAX_UPLOAD_BYTES} bytes"
+        )
+    try:
+        page_count = pdfsvc.count_pages(data)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read PDF")
+    return data, page_count
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
 
+def _select_pages(
+    data: bytes, page_count: int, pages: Optional[str], chapter: Optional[str]
+) -> Optional[List[int]]:
+    """0-based pages to process (None = whole document), from pages= or chapter=."""
+    if pages and chapter:
+        raise HTTPException(status_code=400, detail="Use either pages or chapter, not both")
+    selected: Optional[List[int]] = None
     try:
-        text = pdfsvc.extract_text_from_pdf(tmp_path)
-        if not text:
-            raise HTTPException(status_code=400, detail="No text found in PDF")
+        if pages:
+            # Bound-check the spans before expanding them into a page list
+            spans = pdfsvc.normalize_page_ranges(pages, page_count)
+            n = pdfsvc.span_page_count(spans)
+        elif chapter:
+            selected = pdfsvc.chapter_pages(data, chapter)
+            n = len(selected)
+        else:
+            n = page_count
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        chunks = pdfsvc.split_for_llm(
-            text, max_tokens=min(4000, settings.MAX_INPUT_TOKENS)
+    # The page limit applies to the work requested, not the size of the book
+    if n > settings.MAX_PDF_PAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request covers {n} pages; the limit is {settings.MAX_PDF_PAGES}",
         )
+    if pages:
+        selected = pdfsvc.expand_page_spans(spans)
+    return selected
+
+
+async def _summarize_pdf_bytes(
+    data: bytes, doc_id: str, page_idx: Optional[List[int]] = None, mode: str = "llm"
+) -> str:
+    text = await asyncio.to_thread(pdfsvc.extract_pages, data, doc_id, page_idx)
+    if not text:
+        raise HTTPException(status_code=400, detail="No text found in PDF")
+
+    if mode == "fast":
+        # Local extractive summary: no provider call at all
+        return await asyncio.to_thread(
+            extractive.extractive_summary, text, settings.FAST_SUMMARY_SENTENCES
+        )
+
+    chunks = pdfsvc.split_for_llm(
+        text, max_tokens=min(4000, settings.MAX_INPUT_TOKENS)
+    )
+    if settings.SUMMARY_PRECOMPRESS_RATIO < 1.0:
+        chunks = await asyncio.to_thread(
+            extractive.compress_chunks, chunks, settings.SUMMARY_PRECOMPRESS_RATIO
+        )
+
+    try:
+        # summarizer is injected in main.py
+        return await router.summarizer.summarize(  # type: ignore[attr-defined]
+            chunks, settings.TARGET_SUMMARY_TOKENS
+        )
+    except Exception as e:
+        _http_map_provider_error("Summarizer error", e)
+
+
+def _slice_suffix(page_idx: Optional[List[int]]) -> str:
+    # Results for a page slice are stored next to the whole-document ones, e.g. "summary.p40-65"
+    return "" if page_idx is None else f".p{pdfsvc.format_page_ranges(page_idx)}"
 
-        try:
-            # summarizer is injected in main.py
-            summary = await router.summarizer.summarize(  # type: ignore[attr-defined]
-                chunks, settings.TARGET_SUMMARY_TOKENS
-            )
-        except Exception as e:
-            _http_map_provider_error("Summarizer error", e)
 
-        return {"summary": summary}
+def _requested_slice(pages: Optional[str]) -> str:
+    # Built from the normalized spans, never the page list: the spec is untrusted
+    if not pages:
+        return ""
+    try:
+        return f".p{pdfsvc.format_page_spans(pdfsvc.normalize_page_ranges(pages))}"
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _summary_kind(mode: str) -> str:
+    # Fast summaries are stored apart so they never stand in for the LLM one
+    return "summary" if mode == "llm" else "summary-fast"
+
+
+def _load_stored(doc_id: str, kind: str) -> dict:
+    if not store.is_document_hash(doc_id):
+        raise HTTPException(status_code=400, detail="Invalid document id")
+    result = store.load_result(doc_id, kind)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No stored {kind} for this document")
+    return result
+
+
+def _to_quiz_item(i: int, item: dict) -> dict:
+    ai = int(item.get("answer_index", 0))
+    choices = item.get("choices", []) or []
+    ans = choices[ai] if 0 <= ai < len(choices) else None
+    return {
+        "id": i,
+        "question": item.get("question", ""),
+        "type": "mcq",
+        "choices": choices,
+        "answer_index": ai,
+        "answer": ans,
+        "section": item.get("section"),
+    }
+
+
+# ------------------------------ Routes ---------------------------------------
+@router.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@router.get("/metrics/routing")
+def routing_metrics():
+    """Per-provider routing stats: calls, errors, failovers, EWMA latency, error rate."""
+    return router.summarizer.metrics()  # type: ignore[attr-defined]
+
+
+@router.post("/summarize", response_model=SummaryResponse)
+async def summarize_pdf(
+    file: UploadFile = File(...),
+    mode: Literal["llm", "fast"] = "llm",
+    pages: Optional[str] = None,
+    chapter: Optional[str] = None,
+):
+    """
+    mode=llm  → Gemini summary (default).
+    mode=fast → local extractive summary; for quick previews or when the provider is slow/rate-limited.
+    pages="40-65,70" or chapter="<outline title>" restrict the work to those pages.
+    """
+    data, page_count = await _read_pdf_upload(file)
+    doc_id = store.document_hash(data)
+    page_idx = _select_pages(data, page_count, pages, chapter)
+
+    summary = await _summarize_pdf_bytes(data, doc_id, page_idx, mode)
 
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+    result = {
+        "summary": summary,
+        "document_id": doc_id,
+        "pages": pdfsvc.format_page_ranges(page_idx) if page_idx is not None else None,
+    }
+    store.save_result(doc_id, _summary_kind(mode) + _slice_suffix(page_idx), result)
+    return result
 
 
 @router.post("/study", response_model=StudyResponse)
-async def study_from_pdf(file: UploadFile = File(...)):
+async def study_from_pdf(
+    file: UploadFile = File(...),
+    pages: Optional[str] = None,
+    chapter: Optional[str] = None,
+):
     """
     Study mode returns the full summary (to match your UI) + quiz.
+    pages= / chapter= work as for /summarize.
     """
-    # Reuse summarization flow
-    s = await summarize_pdf(file)
-    # FastAPI returns a dict for response_model in sub-calls
-    summary = s.summary if isinstance(s, SummaryResponse) else s["summary"]
+    data, page_count = await _read_pdf_upload(file)
+    doc_id = store.document_hash(data)
+    page_idx = _select_pages(data, page_count, pages, chapter)
+    suffix = _slice_suffix(page_idx)
+    page_spec = pdfsvc.format_page_ranges(page_idx) if page_idx is not None else None
+
+    summary = await _summarize_pdf_bytes(data, doc_id, page_idx)
+    store.save_result(
+        doc_id, "summary" + suffix,
+        {"summary": summary, "document_id": doc_id, "pages": page_spec},
+    )
 
     # Generate quiz
     try:
@@ -93,24 +237,109 @@ async def study_from_pdf(file: UploadFile = File(...)):
         _http_map_provider_error("Quiz generation error", e)
 
     # Normalize quiz items
-    quiz: List[dict] = []
-    for i, item in enumerate(raw_items, start=1):
-        ai = int(item.get("answer_index", 0))
-        choices = item.get("choices", []) or []
-        ans = choices[ai] if 0 <= ai < len(choices) else None
-        quiz.append(
-            {
-                "id": i,
-                "question": item.get("question", ""),
-                "type": "mcq",
-                "choices": choices,
-                "answer_index": ai,
-                "answer": ans,
-            }
-        )
+    quiz: List[dict] = [
+        _to_quiz_item(i, item) for i, item in enumerate(raw_items, start=1)
+    ]
 
     # Return full summary for Study page; overview removed
-    return {"summary": summary, "quiz": quiz}
+    result = {"summary": summary, "quiz": quiz, "document_id": doc_id, "pages": page_spec}
+    store.save_result(doc_id, "study" + suffix, result)
+    return result
+
+
+@router.get("/documents/{doc_id}/summary", response_model=SummaryResponse)
+def get_document_summary(
+    doc_id: str,
+    request: Request,
+    mode: Literal["llm", "fast"] = "llm",
+    pages: Optional[str] = None,
+):
+    """Serve a previously generated summary; supports If-None-Match → 304."""
+    result = _load_stored(doc_id, _summary_kind(mode) + _requested_slice(pages))
+    return cached_json_response(
+        request, result, max_age=settings.DOCUMENT_CACHE_MAX_AGE
+    )
+
+
+@router.get("/documents/{doc_id}/study", response_model=StudyResponse)
+def get_document_study(doc_id: str, request: Request, pages: Optional[str] = None):
+    """Serve a previously generated summary + quiz; supports If-None-Match → 304."""
+    result = _load_stored(doc_id, "study" + _requested_slice(pages))
+    return cached_json_response(
+        request, result, max_age=settings.DOCUMENT_CACHE_MAX_AGE
+    )
+
+
+@router.get("/documents/{doc_id}/quiz/stream")
+async def stream_document_quiz(doc_id: str):
+    """
+    Generate a fresh quiz from the stored summary and stream it as NDJSON:
+    one QuizItem per line, sent as soon as the model closes each question.
+    """
+    summary = _load_stored(doc_id, "summary")["summary"]
+    items = stream_quiz_with_gemini(
+        summary, settings.QUIZ_NUM_QUESTIONS, settings.QUIZ_STYLE
+    )
+
+    # Pull the first item before responding so provider errors still map to HTTP codes
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        _http_map_provider_error("Quiz generation error", e)
+
+    async def _lines():
+        if first is None:
+            return
+        yield json.dumps(_to_quiz_item(1, first), ensure_ascii=False) + "\n"
+        i = 2
+        async for item in items:
+            yield json.dumps(_to_quiz_item(i, item), ensure_ascii=False) + "\n"
+            i += 1
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/documents/{doc_id}/quiz", response_model=QuizResponse)
+async def get_document_quiz(
+    doc_id: str,
+    request: Request,
+    n: int = Query(5, ge=1, le=50),
+    seed: Optional[int] = None,
+):
+    """
+    Randomized quiz drawn from the document's question bank. The bank is
+    generated once (on first request) and every later quiz is served
+    without calling Gemini. Pass the returned seed to get the same quiz again.
+    """
+    if not store.is_document_hash(doc_id):
+        raise HTTPException(status_code=400, detail="Invalid document id")
+    try:
+        questions = await get_or_build_bank(doc_id)
+    except Exception as e:
+        _http_map_provider_error("Question bank error", e)
+    if questions is None:
+        raise HTTPException(status_code=404, detail="No stored summary for this document")
+    if not questions:
+        raise HTTPException(status_code=502, detail="Question bank generation returned no questions")
+
+    cacheable = seed is not None
+    if seed is None:
+        seed = random.randrange(2**31)
+
+    items = sample_quiz(questions, n, seed)
+    result = {
+        "document_id": doc_id,
+        "seed": seed,
+        "quiz": [_to_quiz_item(i, it) for i, it in enumerate(items, start=1)],
+    }
+    if not cacheable:
+        # A fresh random quiz every time: don't let caches replay it
+        return JSONResponse(result, headers={"Cache-Control": "no-store"})
+    return cached_json_response(
+        request, result, max_age=settings.DOCUMENT_CACHE_MAX_AGE
+    )
 
 
 @router.post("/feedback", response_model=FeedbackResponse)
@@ -137,3 +366,31 @@ def feedback(req: FeedbackRequest):
         "explanation": str(result.get("explanation", "") or "Explanation unavailable."),
         "guidance": result.get("guidance"),
     }
+
+
+@router.post("/feedback/batch", response_model=FeedbackBatchResponse)
+def feedback_batch(req: FeedbackBatchRequest):
+    """
+    Grade a whole quiz in one request. Correct answers are handled locally;
+    all wrong answers are explained by a single Gemini call.
+    """
+    try:
+        results = generate_feedback_batch_with_gemini(
+            items=[it.model_dump() for it in req.items],
+            summary=req.summary,
+            explain_if_correct=req.explain_if_correct,
+            detail=req.detail,
+        )
+    except Exception as e:
+        _http_map_provider_error("Feedback error", e)
+
+    return {
+        "results": [
+            {
+                "correct": bool(r.get("correct", False)),
+                "explanation": str(r.get("explanation", "") or "Explanation unavailable."),
+                "guidance": r.get("guidance"),
+            }
+            for r in results
+        ]
+    }
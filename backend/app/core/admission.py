@@ -0,0 +1,229 @@
+# app/core/admission.py
+from __future__ import annotations
+
+import ipaddress
+import json
+import logging
+import math
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Routes are (method, path regex[, "param=value" the query string must contain]).
+# The first matching group wins, so narrower groups go first.
+
+# Local extractive summaries: no provider call, so they get their own cheap slots
+# and stay available while LLM pipelines hold every pipeline slot
+FAST_ROUTES = (
+    ("POST", r"/api/v1/summarize", "mode=fast"),
+)
+
+# Upload endpoints that run the full extract → summarize (→ quiz) pipeline
+PIPELINE_ROUTES = (
+    ("POST", r"/api/v1/summarize"),
+    ("POST", r"/api/v1/study"),
+)
+
+# Other v1 routes that call the LLM (the quiz route builds the bank on first use)
+LLM_ROUTES = (
+    ("POST", r"/api/v1/feedback"),
+    ("POST", r"/api/v1/feedback/batch"),
+    ("GET", r"/api/v1/documents/[^/]+/quiz"),
+    ("GET", r"/api/v1/documents/[^/]+/quiz/stream"),
+)
+
+
+def _parse_trusted(spec: str):
+    # "*" trusts any peer; otherwise comma-separated IPs / CIDR networks
+    spec = (spec or "").strip()
+    if spec == "*":
+        return "*"
+    return [ipaddress.ip_network(p.strip(), strict=False) for p in spec.split(",") if p.strip()]
+
+
+def _is_trusted(host: str, trusted) -> bool:
+    if trusted == "*":
+        return True
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(ip in net for net in trusted)
+
+
+def _client_key(scope, trusted) -> str:
+    """
+    Client address for per-client limits. Behind a trusted proxy this is the
+    nearest X-Forwarded-For hop that isn't itself a trusted proxy (the same
+    rule as uvicorn's --forwarded-allow-ips); otherwise the direct peer.
+    """
+    peer = (scope.get("client") or ("unknown", 0))[0]
+    if not trusted or not _is_trusted(peer, trusted):
+        return peer
+    xff = dict(scope.get("headers") or []).get(b"x-forwarded-for")
+    if not xff:
+        return peer
+    hops = [h.strip() for h in xff.decode("latin-1").split(",") if h.strip()]
+    if not hops:
+        return peer
+    if trusted == "*":
+        return hops[0]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return hops[0]
+
+
+class AdmissionController:
+    """
+    Caps concurrently active requests of one route group, globally and per client.
+
+    A client may never hold more than max_per_client slots, and once more
+    than one client is active each is limited to its fair share of
+    max_active. Everything runs on the event loop, so plain counters are
+    enough (no locks).
+    """
+
+    def __init__(self, max_active: int, max_per_client: int, retry_after: int):
+        self.max_active = max(1, max_active)
+        self.max_per_client = max(1, max_per_client)
+        self._active = 0
+        self._by_client: Dict[str, int] = {}
+        # EWMA of pipeline duration, seeded with the configured Retry-After
+        self._avg_seconds = float(max(1, retry_after))
+        self.rejected = {"busy": 0, "client": 0}
+
+    def _fair_share(self, client: str) -> int:
+        clients = len(self._by_client) + (0 if client in self._by_client else 1)
+        return max(1, min(self.max_per_client, self.max_active // clients))
+
+    def try_acquire(self, client: str) -> Optional[Tuple[int, str, int]]:
+        """Take a slot, or return (status, detail, retry_after) describing the rejection."""
+        held = self._by_client.get(client, 0)
+        if held >= self._fair_share(client):
+            self.rejected["client"] += 1
+            return 429, "Too many concurrent requests from this client", math.ceil(self._avg_seconds)
+        if self._active >= self.max_active:
+            self.rejected["busy"] += 1
+            wait = math.ceil(self._avg_seconds / self.max_active)
+            return 503, "Server is busy, please retry shortly", max(1, wait)
+        self._active += 1
+        self._by_client[client] = held + 1
+        return None
+
+    def release(self, client: str, elapsed: float) -> None:
+        self._active -= 1
+        held = self._by_client.get(client, 1) - 1
+        if held > 0:
+            self._by_client[client] = held
+        else:
+            self._by_client.pop(client, None)
+        self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def stats(self) -> Dict:
+        return {
+            "active": self._active,
+            "max_active": self.max_active,
+            "clients": len(self._by_client),
+            "avg_seconds": round(self._avg_seconds, 2),
+            "rejected": dict(self.rejected),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware in front of the v1 upload and LLM routes. Each route
+    group has its own controller. Rejects oversized uploads (by
+    Content-Length) and saturated/unfair traffic before the body is read,
+    with a fast 413/429/503 + Retry-After.
+    """
+
+    def __init__(self, app, groups: List[Tuple[AdmissionController, Tuple[Tuple[str, ...], ...]]]):
+        self.app = app
+        self.trusted = _parse_trusted(settings.ADMISSION_TRUSTED_PROXIES)
+        self.routes: List[Tuple[str, Pattern, Optional[Tuple[str, str]], AdmissionController]] = [
+            (method, re.compile(f"{path}$"), tuple(query[0].split("=", 1)) if query else None, controller)
+            for controller, routes in groups
+            for method, path, *query in routes
+        ]
+
+    def _match(self, scope) -> Optional[AdmissionController]:
+        method, path = scope.get("method"), scope["path"]
+        params = None
+        for m, rx, query, controller in self.routes:
+            if m != method or not rx.match(path):
+                continue
+            if query is not None:
+                if params is None:
+                    params = parse_qsl((scope.get("query_string") or b"").decode("latin-1"))
+                if query not in params:
+                    continue
+            return controller
+        return None
+
+    async def _reject(self, send, status: int, detail: str, retry_after: Optional[int] = None):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        controller = self._match(scope) if scope["type"] == "http" else None
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        try:
+            length = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            length = 0
+        if length > settings.MAX_UPLOAD_BYTES:
+            await self._reject(send, 413, f"Upload exceeds {settings.MAX_UPLOAD_BYTES} bytes")
+            return
+
+        client = _client_key(scope, self.trusted)
+        rejection = controller.try_acquire(client)
+        if rejection is not None:
+            status, detail, retry_after = rejection
+            logger.warning(
+                "admission rejected",
+                extra={"status": status, "client": client, **controller.stats()},
+            )
+            await self._reject(send, status, detail, retry_after)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(client, time.perf_counter() - start)
+
+
+admission = AdmissionController(
+    max_active=settings.ADMISSION_MAX_ACTIVE,
+    max_per_client=settings.ADMISSION_MAX_PER_CLIENT,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+)
+
+fast_admission = AdmissionController(
+    max_active=settings.ADMISSION_MAX_ACTIVE_FAST,
+    max_per_client=settings.ADMISSION_MAX_PER_CLIENT,
+    retry_after=1,
+)
+
+llm_admission = AdmissionController(
+    max_active=settings.ADMISSION_MAX_ACTIVE_LLM,
+    max_per_client=settings.ADMISSION_MAX_PER_CLIENT_LLM,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+)
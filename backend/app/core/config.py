@@ -24,18 +24,56 @@ class Settings(BaseSettings):
     SUMMARY_PROVIDER: str = "gemini"
     GEMINI_API_KEY: str
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    # Routed summarizers, "kind:model[@rpm]" comma-separated; kinds: gemini, gemini-single.
+    # rpm = provider API requests per minute (a gemini call is one per chunk + a merge).
+    # Empty = a single gemini route on GEMINI_MODEL.
+    SUMMARY_PROVIDERS: str = ""
 
     # -------------------------------------------------------------------------
     # Limits
     # -------------------------------------------------------------------------
     MAX_INPUT_TOKENS: int = 120_000
     TARGET_SUMMARY_TOKENS: int = 800
+    FAST_SUMMARY_SENTENCES: int = 12       # sentences kept by /summarize?mode=fast
+    SUMMARY_PRECOMPRESS_RATIO: float = 1.0 # <1.0 keeps only the most central sentences per chunk
+    MAX_UPLOAD_BYTES: int = 25_000_000
+    MAX_PDF_PAGES: int = 500
+
+    # -------------------------------------------------------------------------
+    # Admission control (upload pipelines + other LLM routes)
+    # -------------------------------------------------------------------------
+    ADMISSION_MAX_ACTIVE: int = 4        # pipelines running at once
+    ADMISSION_MAX_ACTIVE_LLM: int = 8    # feedback / quiz-bank / quiz-stream calls at once
+    ADMISSION_MAX_ACTIVE_FAST: int = 16  # /summarize?mode=fast (local, no LLM) at once
+    ADMISSION_MAX_PER_CLIENT: int = 2    # per client IP, further capped by fair share
+    ADMISSION_MAX_PER_CLIENT_LLM: int = 6  # same, for the LLM routes (one /feedback per answered card)
+    ADMISSION_RETRY_AFTER: int = 10      # initial Retry-After estimate (seconds)
+    # Peers whose X-Forwarded-For names the real client: comma-separated IPs/CIDRs,
+    # or "*" behind a platform proxy (e.g. Render). Empty = key on the direct peer.
+    ADMISSION_TRUSTED_PROXIES: str = ""
 
     # -------------------------------------------------------------------------
     # Quiz Configuration
     # -------------------------------------------------------------------------
     QUIZ_NUM_QUESTIONS: int = 5
     QUIZ_STYLE: str = "mcq"
+    QUIZ_BANK_SIZE: int = 40                  # questions generated once per document
+    QUIZ_BANK_CALLS: int = 4                  # parallel Gemini calls used to build a bank
+    QUIZ_BANK_DEDUP_THRESHOLD: float = 0.8    # Jaccard overlap treated as a duplicate
+
+    # -------------------------------------------------------------------------
+    # Document store (results served by GET /documents/{hash}/...)
+    # -------------------------------------------------------------------------
+    DOCUMENT_STORE_DIR: str = ".cache/documents"
+    DOCUMENT_CACHE_MAX_AGE: int = 3600  # seconds, for Cache-Control
+
+    # -------------------------------------------------------------------------
+    # Logging
+    # -------------------------------------------------------------------------
+    LOG_LEVEL: str = "INFO"              # DEBUG=1 in the environment forces DEBUG
+    LOG_FILE: str = "app.log"            # empty string disables the file log
+    LOG_JSON: bool = True                # structured JSON records
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1   # fraction of DEBUG records kept
 
     # -------------------------------------------------------------------------
     # Config
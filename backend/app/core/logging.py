@@ -1,11 +1,111 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from .config import settings
+
+# Set per request by the middleware in main.py. asyncio tasks and
+# asyncio.to_thread() copy the context, so chunk fan-out and SDK calls
+# running in worker threads log with the same id.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came in via extra={...}
+_STD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keep only a fraction of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _STD_ATTRS:
+                out[k] = v
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    # The stock prepare() folds the traceback into msg; keep it separate for JSON output
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        msg = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args = msg, None
+        record.exc_info, record.exc_text = None, exc_text
+        return record
+
 
 def configure_logging():
-    fmt = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    logging.basicConfig(level=logging.INFO, format=fmt)
+    """
+    Route all records through a queue to a background listener thread, so
+    console/file writes and log rollover never block request handling.
+    """
+    global _listener
+    if _listener is not None:
+        return
 
+    debug = os.getenv("DEBUG", "").lower() in {"1", "true", "yes"}
+    level = logging.DEBUG if debug else getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+
+    if settings.LOG_JSON:
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s"
+        )
+
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
     # Optional rotating file log
-    fh = RotatingFileHandler("app.log", maxBytes=2_000_000, backupCount=2)
-    fh.setFormatter(logging.Formatter(fmt))
-    logging.getLogger().addHandler(fh)
+    if settings.LOG_FILE:
+        handlers.append(RotatingFileHandler(settings.LOG_FILE, maxBytes=2_000_000, backupCount=2))
+    for h in handlers:
+        h.setFormatter(formatter)
+
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    qh = _QueueHandler(q)
+    qh.addFilter(RequestIdFilter())
+    qh.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(qh)
+
+    _listener = QueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
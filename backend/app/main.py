@@ -1,16 +1,40 @@
-from fastapi import FastAPI
+import logging
+import time
+import uuid
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from .core.admission import (
+    FAST_ROUTES,
+    LLM_ROUTES,
+    PIPELINE_ROUTES,
+    AdmissionMiddleware,
+    admission,
+    fast_admission,
+    llm_admission,
+)
 from .core.config import settings
-from .core.logging import configure_logging
+from .core.logging import configure_logging, request_id_var
 from .api.v1 import router as api_router
-from .services.summarizer.gemini_provider import GeminiSummarizer
+from .services.summarizer.router import build_summary_router
 
 
 def build_app() -> FastAPI:
     configure_logging()
     app = FastAPI(title="AI Study Buddy", version="0.2.0")
 
+    # Admission control for LLM-backed routes: fast 413/429/503 + Retry-After.
+    # Added before CORS so CORS wraps it and its rejections stay readable cross-origin.
+    app.add_middleware(
+        AdmissionMiddleware,
+        groups=[
+            (fast_admission, FAST_ROUTES),
+            (admission, PIPELINE_ROUTES),
+            (llm_admission, LLM_ROUTES),
+        ],
+    )
+
     # CORS
     app.add_middleware(
         CORSMiddleware,
@@ -19,13 +43,33 @@ def build_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Request-ID", "ETag", "Retry-After"],
     )
 
+    # Request correlation: every log record emitted while handling a request
+    # (including worker threads) carries this id; clients may supply their own.
+    access_log = logging.getLogger("app.access")
+
+    @app.middleware("http")
+    async def request_context(request: Request, call_next):
+        rid = request.headers.get("x-request-id") or uuid.uuid4().hex
+        token = request_id_var.set(rid)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = rid
+            access_log.info(
+                "%s %s -> %s", request.method, request.url.path, response.status_code,
+                extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+            )
+            return response
+        finally:
+            request_id_var.reset(token)
 
-    # Inject Gemini summarizer
+    # Inject the summarizer: a latency-aware router over the configured Gemini providers
     if not settings.GEMINI_API_KEY:
         raise RuntimeError("GEMINI_API_KEY is not set in your environment (.env)")
-    summarizer = GeminiSummarizer(api_key=settings.GEMINI_API_KEY, model=settings.GEMINI_MODEL)
+    summarizer = build_summary_router()
 
     # Make the summarizer available to API routes
     from .api import v1 as v1mod
@@ -1,6 +1,6 @@
 # app/models/schemas.py
 from typing import List, Optional, Literal
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # ---- Health ----
 class HealthResponse(BaseModel):
@@ -10,6 +10,8 @@ class HealthResponse(BaseModel):
 # ---- Summarization ----
 class SummaryResponse(BaseModel):
     summary: str
+    document_id: Optional[str] = None  # sha256 of the PDF; use with GET /documents/{id}/...
+    pages: Optional[str] = None        # 1-based page ranges covered, e.g. "40-65"; None = whole PDF
 
 
 # ---- Study / Quiz ----
@@ -20,12 +22,22 @@ class QuizItem(BaseModel):
     choices: List[str]
     answer_index: int            # 0-based index of the correct choice
     answer: Optional[str] = None # convenience field for UI (resolved correct choice string)
+    section: Optional[str] = None # summary section the question covers (question bank only)
 
 
 class StudyResponse(BaseModel):
     # Study page returns the full summary and the quiz — no overview.
     summary: str
     quiz: List[QuizItem]
+    document_id: Optional[str] = None
+    pages: Optional[str] = None
+
+
+class QuizResponse(BaseModel):
+    # Randomized quiz drawn from a document's question bank
+    document_id: str
+    seed: int
+    quiz: List[QuizItem]
 
 
 # ---- Feedback (per-question explanations) ----
@@ -43,3 +55,22 @@ class FeedbackResponse(BaseModel):
     correct: bool
     explanation: str
     guidance: Optional[str] = None
+
+
+# ---- Batch feedback (grade a whole quiz in one call) ----
+class FeedbackBatchItem(BaseModel):
+    question: str
+    choices: List[str]
+    selected_index: int
+    answer_index: int
+
+
+class FeedbackBatchRequest(BaseModel):
+    items: List[FeedbackBatchItem] = Field(max_length=50)  # same cap as quiz n; keeps the reply within max_output_tokens
+    summary: Optional[str] = None
+    explain_if_correct: bool = False
+    detail: Literal["short", "full"] = "short"
+
+
+class FeedbackBatchResponse(BaseModel):
+    results: List[FeedbackResponse]   # same order as request items
@@ -0,0 +1,250 @@
+# app/services/extractive.py
+# Local extractive summarization: TF-IDF sentence vectors ranked by a blend of
+# centroid similarity and TextRank. Backs /summarize?mode=fast and the optional
+# pre-compression of chunks before they are sent to the summarizer.
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from .summarizer.gemini_provider import _post_clean
+
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])|\n{2,}")
+_WORD_RE = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+_STOPWORDS = frozenset(
+    """
+    the and for are but not you all any can had her was one our out has him his how its
+    may new now old see two who did get let put say she too use that with have this will
+    your from they been were said each which their there what about would these other into
+    more some than then them only also such when where while most many much very over under
+    upon between because both during before after above below does doing just should could
+    those being here through again further once same off own why yet via per
+    """.split()
+)
+
+# TextRank runs on the best candidates by centroid score; keeps it O(M^2) with M small
+_TEXTRANK_CANDIDATES = 300
+# A candidate this similar (TF-IDF cosine) to an already-picked sentence is skipped
+_MMR_MAX_SIMILARITY = 0.7
+_NORM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _is_sentence(s: str) -> bool:
+    return 20 <= len(s) <= 600 and len(s.split()) >= 4
+
+
+def _segments(text: str) -> List[str]:
+    """Whitespace-normalized spans in document order (sentences and anything else)."""
+    out: List[str] = []
+    for s in _SENT_SPLIT_RE.split(text or ""):
+        s = " ".join(s.split())
+        if s:
+            out.append(s)
+    return out
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in _segments(text) if _is_sentence(s)]
+
+
+def _norm_key(s: str) -> str:
+    return _NORM_RE.sub(" ", s.lower()).strip()
+
+
+def _dedupe(sentences: List[str]) -> Tuple[List[int], np.ndarray]:
+    """Indices of first occurrences (after normalization) and how often each occurs."""
+    first: dict = {}
+    counts: List[int] = []
+    for i, s in enumerate(sentences):
+        key = _norm_key(s)
+        if key in first:
+            counts[first[key][1]] += 1
+        else:
+            first[key] = (i, len(counts))
+            counts.append(1)
+    return [i for i, _ in first.values()], np.asarray(counts, dtype=np.float64)
+
+
+def _repeat_penalty(counts: np.ndarray) -> np.ndarray:
+    # A line seen on many pages (running header/footer) is boilerplate, not a key point;
+    # a sentence restated once is left alone
+    return 1.0 / np.maximum(1.0, counts - 1.0)
+
+
+def _tfidf(sentences: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Sparse TF-IDF as (row, col, weight) triplets with L2-normalized rows.
+    Returns rows, cols, weights, vocab size.
+    """
+    vocab: dict = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, s in enumerate(sentences):
+        for w in _WORD_RE.findall(s.lower()):
+            if w in _STOPWORDS:
+                continue
+            rows.append(i)
+            cols.append(vocab.setdefault(w, len(vocab)))
+
+    n, v = len(sentences), len(vocab)
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), v
+
+    # term frequency: collapse duplicate (row, col) pairs
+    keys = np.asarray(rows, dtype=np.int64) * v + np.asarray(cols, dtype=np.int64)
+    uniq, tf = np.unique(keys, return_counts=True)
+    r, c = uniq // v, uniq % v
+
+    df = np.bincount(c, minlength=v)
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    w = (1.0 + np.log(tf)) * idf[c]
+
+    norms = np.sqrt(np.bincount(r, weights=w * w, minlength=n))
+    w = w / np.maximum(norms[r], 1e-12)
+    return r, c, w, v
+
+
+def rank_sentences(sentences: List[str]) -> np.ndarray:
+    """Score each sentence (higher = more central). Returns an array aligned with sentences."""
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    r, c, w, v = _tfidf(sentences)
+    if w.size == 0:
+        return np.zeros(n)
+
+    # centroid similarity over all sentences
+    centroid = np.bincount(c, weights=w, minlength=v) / n
+    centroid /= max(np.linalg.norm(centroid), 1e-12)
+    central = np.bincount(r, weights=w * centroid[c], minlength=n)
+
+    # TextRank over the top candidates (dense, restricted to their vocabulary)
+    m = min(n, _TEXTRANK_CANDIDATES)
+    cand = np.argsort(-central, kind="stable")[:m]
+    pos = np.full(n, -1, dtype=np.int64)
+    pos[cand] = np.arange(m)
+    keep = pos[r] >= 0
+    cr, cc, cw = pos[r[keep]], c[keep], w[keep]
+    used, cc = np.unique(cc, return_inverse=True)
+    x = np.zeros((m, used.size))
+    x[cr, cc] = cw
+
+    sim = x @ x.T
+    np.fill_diagonal(sim, 0.0)
+    out_deg = sim.sum(axis=1, keepdims=True)
+    trans = np.divide(sim, out_deg, out=np.full_like(sim, 1.0 / m), where=out_deg > 0)
+    pr = np.full(m, 1.0 / m)
+    for _ in range(30):
+        nxt = 0.15 / m + 0.85 * (trans.T @ pr)
+        if np.abs(nxt - pr).sum() < 1e-6:
+            pr = nxt
+            break
+        pr = nxt
+
+    def _scale(a: np.ndarray) -> np.ndarray:
+        span = a.max() - a.min()
+        return (a - a.min()) / span if span > 0 else np.ones_like(a)
+
+    scores = _scale(central) * 0.5
+    scores[cand] += _scale(pr) * 0.5
+    return scores
+
+
+def _dense_vectors(sentences: List[str]) -> np.ndarray:
+    """L2-normalized TF-IDF rows as a dense matrix (over the vocabulary actually used)."""
+    r, c, w, v = _tfidf(sentences)
+    x = np.zeros((len(sentences), max(v, 1)))
+    x[r, c] = w
+    return x
+
+
+def top_sentences(sentences: List[str], k: int) -> List[str]:
+    """
+    The k best sentences, in document order. Exact repeats count once (and
+    lines repeated across many pages are penalized); a candidate too similar
+    to an already-picked sentence is skipped (MMR-style).
+    """
+    uniq, counts = _dedupe(sentences)
+    if not uniq:
+        return []
+    cands = [sentences[i] for i in uniq]
+    scores = rank_sentences(cands) * _repeat_penalty(counts)
+
+    pool = np.argsort(-scores, kind="stable")[:_TEXTRANK_CANDIDATES]
+    x = _dense_vectors([cands[i] for i in pool])
+    picked: List[int] = []
+    for j in range(len(pool)):
+        if len(picked) >= k:
+            break
+        if picked and float((x[picked] @ x[j]).max()) > _MMR_MAX_SIMILARITY:
+            continue
+        picked.append(j)
+    return [sentences[uniq[pool[j]]] for j in sorted(picked, key=lambda j: pool[j])]
+
+
+def _key_terms(sentences: List[str], k: int = 8) -> List[str]:
+    counts: dict = {}
+    for s in sentences:
+        for w in _WORD_RE.findall(s.lower()):
+            if w not in _STOPWORDS:
+                counts[w] = counts.get(w, 0) + 1
+    return [w for w, _ in sorted(counts.items(), key=lambda kv: -kv[1])[:k]]
+
+
+def extractive_summary(text: str, max_sentences: int = 12) -> str:
+    """Markdown summary built from the most central sentences of the text."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+    picked = top_sentences(sentences, max_sentences)
+
+    lines = ["## Key Points"]
+    lines += [f"- {s}" for s in picked]
+    terms = _key_terms(picked)
+    if terms:
+        lines += ["", "## Key Terms", "- " + ", ".join(terms)]
+    return _post_clean("\n".join(lines))
+
+
+def compress_chunks(chunks: List[str], ratio: float) -> List[str]:
+    """
+    Keep roughly `ratio` of each chunk's sentences (the most central ones).
+    Spans that don't parse as sentences (bullet runs, tables, headings,
+    fragments) are passed through untouched; the ratio applies only to the
+    ranked sentences. Repeated sentences, and spans repeated across the
+    document (running headers/footers), are kept only at first occurrence.
+    """
+    if ratio >= 1.0:
+        return chunks
+    segmented = [_segments(chunk) for chunk in chunks]
+    counts: dict = {}
+    for segments in segmented:
+        for seg in segments:
+            key = _norm_key(seg)
+            counts[key] = counts.get(key, 0) + 1
+
+    seen: set = set()
+    out: List[str] = []
+    for chunk, segments in zip(chunks, segmented):
+        kept: List[str] = []
+        for seg in segments:
+            key = _norm_key(seg)
+            if key in seen and (_is_sentence(seg) or counts[key] > 2):
+                continue
+            seen.add(key)
+            kept.append(seg)
+
+        ranked = [i for i, seg in enumerate(kept) if _is_sentence(seg)]
+        if len(ranked) < 4:
+            out.append(chunk if len(kept) == len(segments) else " ".join(kept))
+            continue
+        k = max(1, int(round(len(ranked) * ratio)))
+        penalty = _repeat_penalty(np.asarray([counts[_norm_key(kept[i])] for i in ranked], dtype=np.float64))
+        scores = rank_sentences([kept[i] for i in ranked]) * penalty
+        dropped = {ranked[j] for j in np.argsort(-scores, kind="stable")[k:]}
+        out.append(" ".join(seg for i, seg in enumerate(kept) if i not in dropped))
+    return out
@@ -1,12 +1,14 @@
 # app/services/feedback.py
 from __future__ import annotations
 
-import json, os, re, time
+import json, logging, re, time
 from typing import Dict, List, Optional
 
 import google.generativeai as genai
 from ..core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # --- Gemini client -----------------------------------------------------------
 genai.configure(api_key=settings.GEMINI_API_KEY)
 _MODEL = settings.GEMINI_MODEL  # e.g. "models/gemini-1.5-flash"
@@ -46,6 +48,20 @@ try:
 except Exception:
     _RESPONSE_SCHEMA = None
 
+# Batch mode: one explanation object per graded item, keyed by its position in the request
+_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "index":       {"type": "integer"},
+            "explanation": {"type": "string"},
+            "guidance":    {"type": "string"},
+        },
+        "required": ["index", "explanation", "guidance"],
+    },
+}
+
 _model_json = genai.GenerativeModel(
     model_name=_MODEL,
     generation_config=_json_cfg,
@@ -64,8 +80,6 @@ _JSON_SPEC = (
     'No markdown, no extra keys, no placeholders like "string" or "N/A".'
 )
 
-_DEBUG = os.getenv("DEBUG", "").lower() in {"1", "true", "yes"}
-
 # --- Helpers -----------------------------------------------------------------
 def _loose_json(s: str) -> Optional[Dict]:
     s = (s or "").strip()
@@ -111,18 +125,18 @@ def _sanitize(parsed: Dict, *, correct: bool) -> Dict:
     return {"correct": bool(cv), "explanation": exp, "guidance": gid}
 
 def _debug(tag: str, resp, raw: str):
-    if not _DEBUG:
+    # DEBUG records are sampled by core.logging; skip the work when disabled
+    if not logger.isEnabledFor(logging.DEBUG):
         return
     try:
         fins = [getattr(c, "finish_reason", None) for c in (resp.candidates or [])]
-        print(f"[feedback] {tag} finish_reasons={fins}")
         pf = getattr(resp, "prompt_feedback", None)
-        if pf:
-            print(f"[feedback] {tag} prompt_feedback={pf}")
     except Exception:
-        pass
-    if raw:
-        print(f"[feedback] {tag} raw[:500]: {raw[:500]}")
+        fins, pf = None, None
+    logger.debug(
+        "feedback %s", tag,
+        extra={"finish_reasons": fins, "prompt_feedback": pf, "raw": (raw or "")[:500]},
+    )
 
 def _graceful_fallback(correct: bool) -> Dict:
     return {
@@ -243,4 +257,105 @@ End with one study tip that begins with "Tip:".
         pass
 
     # Final fallback: never send the “couldn’t parse tutor reply” anymore
-    return _graceful_fallback(correct)
\ No newline at end of file
+    return _graceful_fallback(correct)
+
+
+def _batch_config(n_items: int):
+    max_tokens = min(8192, 256 * max(1, n_items))
+    try:
+        return genai.types.GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=_BATCH_SCHEMA,
+            temperature=0.2, top_p=0.9, max_output_tokens=max_tokens,
+        )
+    except Exception:
+        return genai.types.GenerationConfig(
+            response_mime_type="application/json",
+            temperature=0.2, top_p=0.9, max_output_tokens=max_tokens,
+        )
+
+
+def generate_feedback_batch_with_gemini(
+    *,
+    items: List[Dict],
+    summary: Optional[str] = None,
+    explain_if_correct: bool = False,
+    detail: str = "short",
+) -> List[Dict]:
+    """
+    Grade a whole quiz at once. items: [{question, choices, selected_index, answer_index}, ...]
+    Returns one { correct, explanation, guidance } per item, in order.
+    Correct answers are short-circuited locally (as in the single path); all
+    remaining items are explained by ONE schema-constrained JSON call. Items
+    missing or malformed in the reply get _graceful_fallback.
+    """
+    results: List[Optional[Dict]] = [None] * len(items)
+    pending: List[int] = []
+    for i, it in enumerate(items):
+        correct = it["selected_index"] == it["answer_index"]
+        if correct and not explain_if_correct:
+            results[i] = {"correct": True, "explanation": "Correct! Nice job — that’s the right choice.", "guidance": None}
+        else:
+            pending.append(i)
+
+    if not pending:
+        return results  # type: ignore[return-value]
+
+    context = summary or "No extra context."
+    length_rule = "Keep each explanation to 1–2 sentences." if detail == "short" else "Use 2–4 concise sentences per explanation."
+    blocks = []
+    for i in pending:
+        it = items[i]
+        choices = "\n".join(f"  {j}: {c}" for j, c in enumerate(it["choices"])) or "  No choices provided."
+        blocks.append(
+            f"Item {i}:\nQuestion: {it['question']}\nChoices:\n{choices}\n"
+            f"Student selected index: {it['selected_index']}\nCorrect index: {it['answer_index']}"
+        )
+
+    prompt = f"""
+You are a concise, friendly tutor grading a quiz.
+
+Context (may help):
+{context}
+
+{chr(10).join(blocks)}
+
+For EVERY item above write an explanation. If the student is correct, confirm and briefly explain why.
+If the student is wrong, contrast their choice with the correct choice and clarify the misconception.
+{length_rule}
+Give one study tip per item that begins with "Tip:".
+
+Return ONLY a JSON array with one object per item:
+[{{"index": <item number>, "explanation": "<string>", "guidance": "Tip: <string>"}}]
+No markdown, no extra keys, no placeholders like "string" or "N/A".
+""".strip()
+
+    parsed: Dict[int, Dict] = {}
+    try:
+        resp = _model_json.generate_content(prompt, generation_config=_batch_config(len(pending)))
+        raw = _extract_text(resp)
+        _debug("batch", resp, raw)
+        data = json.loads(raw)
+        if isinstance(data, dict) and "items" in data:
+            data = data["items"]
+        for obj in data if isinstance(data, list) else []:
+            if isinstance(obj, dict):
+                try:
+                    parsed[int(obj.get("index"))] = obj
+                except (TypeError, ValueError):
+                    continue
+    except Exception as e:
+        logger.warning("batch feedback call failed: %s", e)
+
+    for i in pending:
+        correct = items[i]["selected_index"] == items[i]["answer_index"]
+        obj = parsed.get(i)
+        if obj and str(obj.get("explanation") or "").strip():
+            results[i] = _sanitize({**obj, "correct": correct}, correct=correct)
+        else:
+            results[i] = _graceful_fallback(correct)
+
+    missing = sum(1 for i in pending if i not in parsed)
+    if missing:
+        logger.info("batch feedback fallback", extra={"items": len(pending), "fallback": missing})
+    return results  # type: ignore[return-value]
@@ -1,17 +1,124 @@
-from typing import List
+import logging
+import time
+from typing import List, Optional, Tuple
 import fitz  # PyMuPDF
 from . import chunk as chunk_utils
+from . import store
 from ..utils.text_clean import clean_text
 
-def extract_text_from_pdf(file_path: str) -> str:
-    doc = fitz.open(file_path)
-    pieces: List[str] = []
-    for page in doc:
-        txt = page.get_text("text")
-        if txt:
-            pieces.append(txt)
-    doc.close()
-    return clean_text("\n\n".join(pieces))
+logger = logging.getLogger(__name__)
+
+def count_pages(data: bytes) -> int:
+    # Opening only parses the xref/page tree; no page content is decoded
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return doc.page_count
+
+def extract_pages(data: bytes, doc_hash: str, pages: Optional[List[int]] = None) -> str:
+    """
+    Text of the given 0-based pages (all pages if None), served from the
+    per-page cache; only missing pages are loaded from the PDF.
+    """
+    start = time.perf_counter()
+    if pages is None:
+        pages = list(range(count_pages(data)))
+    cached = store.load_pages(doc_hash, pages)
+    missing = [i for i in pages if i not in cached]
+
+    if missing:
+        fresh = {}
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            for i in missing:
+                fresh[i] = doc.load_page(i).get_text("text") or ""
+        store.save_pages(doc_hash, fresh)
+        cached.update(fresh)
+
+    text = clean_text("\n\n".join(cached[i] for i in pages if cached[i]))
+    logger.info(
+        "pdf pages extracted",
+        extra={"pages": len(pages), "cached": len(pages) - len(missing), "chars": len(text),
+               "duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+    )
+    return text
+
+def normalize_page_ranges(spec: str, page_count: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    "7,1-3,2-4" (1-based, inclusive) -> sorted, merged spans [(1, 4), (7, 7)].
+    Never expands the ranges, so huge bounds cost nothing.
+    Raises ValueError on malformed or out-of-range input.
+    """
+    spans: List[Tuple[int, int]] = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        try:
+            a = int(lo)
+            b = int(hi) if sep else a
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part!r}") from None
+        if a < 1 or b < a or (page_count is not None and b > page_count):
+            raise ValueError(f"Invalid page range: {part!r}")
+        spans.append((a, b))
+    if not spans:
+        raise ValueError("Empty page range")
+    spans.sort()
+    merged = [spans[0]]
+    for a, b in spans[1:]:
+        if a <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+def span_page_count(spans: List[Tuple[int, int]]) -> int:
+    return sum(b - a + 1 for a, b in spans)
+
+def expand_page_spans(spans: List[Tuple[int, int]]) -> List[int]:
+    """[(1, 3), (7, 7)] -> 0-based page indices [0, 1, 2, 6]."""
+    return [i for a, b in spans for i in range(a - 1, b)]
+
+def format_page_spans(spans: List[Tuple[int, int]]) -> str:
+    """Inverse of normalize_page_ranges: [(1, 3), (7, 7)] -> "1-3,7"."""
+    return ",".join(f"{a}-{b}" if b > a else str(a) for a, b in spans)
+
+def format_page_ranges(pages: List[int]) -> str:
+    """0-based page indices -> 1-based spec: [0,1,2,6] -> "1-3,7"."""
+    spans: List[Tuple[int, int]] = []
+    for i in pages:
+        if spans and i + 1 == spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], i + 1)
+        else:
+            spans.append((i + 1, i + 1))
+    return format_page_spans(spans)
+
+def chapter_pages(data: bytes, chapter: str) -> List[int]:
+    """
+    0-based pages of an outline (bookmark) entry, matched by title: exact
+    (case-insensitive) first, else first title containing the text. The
+    chapter ends where the next entry at the same or a higher level starts.
+    """
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        toc = doc.get_toc()
+        n_pages = doc.page_count
+    want = chapter.strip().lower()
+    idx = next((i for i, (_, t, _) in enumerate(toc) if t.strip().lower() == want), None)
+    if idx is None:
+        idx = next((i for i, (_, t, _) in enumerate(toc) if want in t.lower()), None)
+    if idx is None:
+        raise ValueError(f"Chapter not found in PDF outline: {chapter!r}")
+
+    level, title, first = toc[idx]
+    if first < 1:
+        # PyMuPDF reports -1 for entries whose destination isn't a page in this file
+        raise ValueError(f"Chapter has no page in this PDF: {title!r}")
+    last = n_pages
+    for lvl, _, page in toc[idx + 1:]:
+        if lvl <= level and page > 0:
+            last = page - 1
+            break
+    last = max(first, min(last, n_pages))
+    return list(range(first - 1, last))
 
 def split_for_llm(text: str, max_tokens: int = 4000) -> list[str]:
     # safe chunking for long PDFs
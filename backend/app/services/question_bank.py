@@ -0,0 +1,206 @@
+# app/services/question_bank.py
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from . import store
+from .quiz import (
+    _QUIZ_INSTRUCTIONS,
+    _QUIZ_SCHEMA,
+    _stream_json_array,
+    _validate_item,
+)
+
+# Same item shape as a quiz, plus the summary section each question came from
+_BANK_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            **_QUIZ_SCHEMA["items"]["properties"],
+            "section": {"type": "string"},
+        },
+        "required": [*_QUIZ_SCHEMA["items"]["required"], "section"],
+    },
+}
+
+_BANK_JSON_SPEC = (
+    "Return ONLY a JSON array, exactly like:\n"
+    '[{"question":"...","choices":["A","B","C","D"],"answer_index":0,"section":"<heading>"}]\n'
+    "Ensure: 4 choices per question; answer_index is 0..3; "
+    "section is copied verbatim from the heading the question is about."
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# One in-flight build per document; concurrent requests await the same task
+_builds: Dict[str, asyncio.Task] = {}
+
+
+def _split_sections(summary: str) -> List[Tuple[str, str]]:
+    """Split summary Markdown on H2 headings -> [(title, body), ...]."""
+    sections: List[Tuple[str, str]] = []
+    title, lines = "General", []
+    for line in (summary or "").splitlines():
+        if line.startswith("## "):
+            if any(l.strip() for l in lines):
+                sections.append((title, "\n".join(lines).strip()))
+            title, lines = line[3:].strip() or "General", []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines).strip()))
+    return sections
+
+
+def _group_sections(sections: List[Tuple[str, str]], n_groups: int) -> List[List[Tuple[str, str]]]:
+    n_groups = max(1, min(n_groups, len(sections)))
+    groups: List[List[Tuple[str, str]]] = [[] for _ in range(n_groups)]
+    for i, sec in enumerate(sections):
+        groups[i % n_groups].append(sec)
+    return groups
+
+
+def _tokens(question: str) -> frozenset:
+    return frozenset(_WORD_RE.findall(question.lower()))
+
+
+def _dedupe(items: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """Drop questions whose word set overlaps an earlier one by >= threshold (Jaccard)."""
+    kept: List[Dict[str, Any]] = []
+    seen: List[frozenset] = []
+    for it in items:
+        toks = _tokens(it["question"])
+        dup = False
+        for other in seen:
+            union = len(toks | other)
+            if union and len(toks & other) / union >= threshold:
+                dup = True
+                break
+        if not dup:
+            kept.append(it)
+            seen.append(toks)
+    return kept
+
+
+async def _generate_for_group(group: List[Tuple[str, str]], num_q: int) -> List[Dict[str, Any]]:
+    headings = ", ".join(f'"{t}"' for t, _ in group)
+    body = "\n\n".join(f"## {t}\n{b}" for t, b in group)
+    prompt = (
+        f"{_QUIZ_INSTRUCTIONS}\n\n"
+        f"Create {num_q} MCQs spread across these sections: {headings}.\n"
+        f"---\n{body}\n---\n\n"
+        f"{_BANK_JSON_SPEC}"
+    )
+    out: List[Dict[str, Any]] = []
+    titles = {t for t, _ in group}
+    async for obj in _stream_json_array(prompt, _BANK_SCHEMA):
+        item = _validate_item(obj)
+        if item is None:
+            continue
+        section = str(obj.get("section", "")).strip()
+        item["section"] = section if section in titles else group[0][0]
+        out.append(item)
+    return out
+
+
+async def build_question_bank(summary: str, size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Generate a pool of ~size MCQs tagged by summary section, using a few
+    parallel Gemini calls (one per group of sections), then dedupe.
+    """
+    size = size or settings.QUIZ_BANK_SIZE
+    sections = _split_sections(summary)
+    if not sections:
+        return []
+    groups = _group_sections(sections, settings.QUIZ_BANK_CALLS)
+
+    # Share the target size across calls; over-ask a little to survive dedupe
+    per_call = -(-int(size * 1.2) // len(groups))
+    results = await asyncio.gather(
+        *[_generate_for_group(g, per_call) for g in groups], return_exceptions=True
+    )
+
+    items: List[Dict[str, Any]] = []
+    errors: List[Exception] = []
+    for r in results:
+        if isinstance(r, Exception):
+            errors.append(r)
+            continue
+        items.extend(r)
+    if not items and errors:
+        raise errors[0]
+
+    return _dedupe(items, settings.QUIZ_BANK_DEDUP_THRESHOLD)[:size]
+
+
+async def _build_and_store(doc_id: str) -> Optional[List[Dict[str, Any]]]:
+    bank = store.load_result(doc_id, "bank")
+    if bank is not None:
+        return bank["questions"]
+    stored = store.load_result(doc_id, "summary")
+    if stored is None:
+        return None
+    questions = await build_question_bank(stored["summary"])
+    if questions:
+        store.save_result(doc_id, "bank", {"document_id": doc_id, "questions": questions})
+    return questions
+
+
+async def get_or_build_bank(doc_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Stored bank for a document, building it from the stored summary on first use."""
+    bank = store.load_result(doc_id, "bank")
+    if bank is not None:
+        return bank["questions"]
+
+    task = _builds.get(doc_id)
+    if task is None:
+        task = asyncio.ensure_future(_build_and_store(doc_id))
+        _builds[doc_id] = task
+        # Only the creating task's completion removes the entry, so a newer build is never dropped
+        task.add_done_callback(
+            lambda t, d=doc_id: _builds.pop(d, None) if _builds.get(d) is t else None
+        )
+    # shield: a cancelled/disconnected caller must not cancel the build other callers await
+    return await asyncio.shield(task)
+
+
+def sample_quiz(questions: List[Dict[str, Any]], n: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Deterministic random quiz of n questions for a given seed. Sections are
+    interleaved so a short quiz still covers several of them, and choice order
+    is shuffled (answer_index follows the correct choice).
+    """
+    rng = random.Random(seed)
+
+    by_section: Dict[str, List[Dict[str, Any]]] = {}
+    for q in questions:
+        by_section.setdefault(q.get("section", "General"), []).append(q)
+    pools = list(by_section.values())
+    for pool in pools:
+        rng.shuffle(pool)
+    rng.shuffle(pools)
+
+    picked: List[Dict[str, Any]] = []
+    while len(picked) < n and any(pools):
+        for pool in pools:
+            if pool and len(picked) < n:
+                picked.append(pool.pop())
+
+    quiz: List[Dict[str, Any]] = []
+    for q in picked:
+        order = list(range(len(q["choices"])))
+        rng.shuffle(order)
+        quiz.append(
+            {
+                "question": q["question"],
+                "choices": [q["choices"][i] for i in order],
+                "answer_index": order.index(q["answer_index"]),
+                "section": q.get("section"),
+            }
+        )
+    return quiz
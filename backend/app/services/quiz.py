@@ -1,11 +1,13 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-import os, json, re, asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional
+import os, json, re, asyncio, logging, time
 
 import google.generativeai as genai
 
 from ..core.config import settings  # for GEMINI_API_KEY / GEMINI_MODEL
 
+logger = logging.getLogger(__name__)
+
 
 # Configure Gemini once
 _genai_configured = False
@@ -42,17 +44,94 @@ _QUIZ_INSTRUCTIONS = (
 )
 
 
-def _clean_json_text(text: str) -> str:
-    """Strip code fences / stray text and try to isolate a JSON array."""
-    t = (text or "").strip()
-    # remove common ```json ... ``` wrappers
-    t = t.strip("`").strip()
-    # if it's already a JSON array, return
-    if t.startswith("[") and t.endswith("]"):
-        return t
-    # try to find the first [...] block
-    m = re.search(r"\[\s*{.*}\s*]\s*$", t, flags=re.S)
-    return m.group(0) if m else t
+# Schema-constrained output: the model must emit a JSON array of MCQs
+_QUIZ_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string"},
+            "choices": {"type": "array", "items": {"type": "string"}},
+            "answer_index": {"type": "integer"},
+        },
+        "required": ["question", "choices", "answer_index"],
+    },
+}
+
+
+def _json_config(schema: Dict[str, Any] = _QUIZ_SCHEMA):
+    """JSON mode with a response schema; drop the schema if the SDK can't take it."""
+    try:
+        return genai.types.GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=schema,
+        )
+    except Exception:
+        return genai.types.GenerationConfig(response_mime_type="application/json")
+
+
+class _JsonArrayStream:
+    """
+    Incremental parser for a top-level JSON array of objects.
+    feed() text as it arrives; each element is returned as soon as its
+    closing brace is seen. Anything before the opening '[' (e.g. a code
+    fence) is skipped.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._in_array = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+
+    def feed(self, text: str) -> List[Any]:
+        out: List[Any] = []
+        for ch in text:
+            if not self._in_array:
+                if ch == "[":
+                    self._in_array = True
+                continue
+            if self._depth == 0:
+                # between elements: only an opening brace or the closing ']' matter
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == "]":
+                    self._in_array = False
+                continue
+
+            self._buf.append(ch)
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                continue
+
+            if ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        out.append(json.loads("".join(self._buf)))
+                    except ValueError:
+                        pass
+                    self._buf = []
+        return out
+
+
+def _chunk_text(chunk) -> str:
+    # .text raises on chunks without parts (e.g. the final finish_reason chunk)
+    try:
+        return chunk.text or ""
+    except Exception:
+        return ""
 
 
 # --- NEW: choice label stripper ---------------------------------------------
@@ -70,27 +149,37 @@ def _strip_choice_label(s: str) -> str:
 # -----------------------------------------------------------------------------
 
 
+def _validate_item(it: Any) -> Optional[Dict[str, Any]]:
+    """Return a normalized MCQ dict, or None if the item is unusable."""
+    if not isinstance(it, dict):
+        return None
+    q = str(it.get("question", "")).strip()
+    choices = it.get("choices", [])
+    ai = it.get("answer_index", 0)
+    if not q:
+        return None
+    if not isinstance(choices, list) or len(choices) != 4:
+        return None
+    # coerce to strings and strip any leading labels like A), (B), 1., etc.
+    choices = [_strip_choice_label(str(c)) for c in choices]
+    # answer_index sanity
+    try:
+        ai = int(ai)
+    except Exception:
+        ai = 0
+    if ai < 0 or ai > 3:
+        ai = 0
+    return {"question": q, "choices": choices, "answer_index": ai}
+
+
 def _validate_items(items: List[Dict[str, Any]], num_q: int) -> List[Dict[str, Any]]:
     """Ensure each item has the right schema; trim/pad to num_q."""
     valid: List[Dict[str, Any]] = []
     for it in items:
-        q = str(it.get("question", "")).strip()
-        choices = it.get("choices", [])
-        ai = it.get("answer_index", 0)
-        if not q:
-            continue
-        if not isinstance(choices, list) or len(choices) != 4:
+        item = _validate_item(it)
+        if item is None:
             continue
-        # coerce to strings and strip any leading labels like A), (B), 1., etc.
-        choices = [_strip_choice_label(str(c)) for c in choices]
-        # answer_index sanity
-        try:
-            ai = int(ai)
-        except Exception:
-            ai = 0
-        if ai < 0 or ai > 3:
-            ai = 0
-        valid.append({"question": q, "choices": choices, "answer_index": ai})
+        valid.append(item)
         if len(valid) >= num_q:
             break
 
@@ -106,40 +195,82 @@ def _validate_items(items: List[Dict[str, Any]], num_q: int) -> List[Dict[str, A
     return valid[:num_q]
 
 
-async def generate_quiz_with_gemini(summary: str, num_q: int = 5, style: str = "mcq") -> List[Dict]:
-    """
-    Generate MCQs with Gemini. Always returns:
-      [{"question": str, "choices": [str,str,str,str], "answer_index": int}, ...]
-    """
-    model = _model_lazy()
-
-    prompt = (
+def _build_prompt(summary: str, num_q: int) -> str:
+    return (
         f"{_QUIZ_INSTRUCTIONS}\n\n"
         f"Create {num_q} MCQs based on this summary:\n"
         f"---\n{summary}\n---\n\n"
         f"{_PROMPT_JSON_SPEC}"
     )
 
-    def _call():
-        resp = model.generate_content(prompt)
-        raw = resp.text or ""
-        raw = _clean_json_text(raw)
+
+async def _stream_json_array(prompt: str, schema: Dict[str, Any] = _QUIZ_SCHEMA) -> AsyncIterator[Any]:
+    """Run a schema-constrained streaming call and yield each array element as it closes."""
+    model = _model_lazy()
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def _produce():
+        # Runs in a worker thread: the SDK's streaming iterator is blocking
         try:
-            data = json.loads(raw)
-        except Exception:
-            # last-ditch: try to find JSON array inside
-            m = re.search(r"\[\s*{.*}\s*]\s*$", raw, flags=re.S)
-            if not m:
-                return []
-            try:
-                data = json.loads(m.group(0))
-            except Exception:
-                return []
-        if isinstance(data, dict) and "items" in data:
-            data = data["items"]
-        if not isinstance(data, list):
-            return []
-        return data
-
-    items = await asyncio.to_thread(_call)
+            resp = model.generate_content(prompt, generation_config=_json_config(schema), stream=True)
+            for chunk in resp:
+                text = _chunk_text(chunk)
+                if text:
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    # If the consumer stops early, the worker drains the rest of the response in the background
+    producer = asyncio.ensure_future(asyncio.to_thread(_produce))
+    parser = _JsonArrayStream()
+    while True:
+        msg = await queue.get()
+        if msg is done:
+            break
+        if isinstance(msg, Exception):
+            raise msg
+        for obj in parser.feed(msg):
+            yield obj
+    await producer
+
+
+async def stream_quiz_with_gemini(summary: str, num_q: int = 5, style: str = "mcq") -> AsyncIterator[Dict]:
+    """
+    Stream MCQs from Gemini as they are generated. Yields validated
+      {"question": str, "choices": [str,str,str,str], "answer_index": int}
+    as soon as each array element closes, up to num_q items.
+    """
+    start = time.perf_counter()
+    count = 0
+    async for obj in _stream_json_array(_build_prompt(summary, num_q)):
+        item = _validate_item(obj)
+        if item is None:
+            logger.debug("dropped invalid quiz item", extra={"item": str(obj)[:200]})
+            continue
+        if count == 0:
+            logger.info(
+                "first quiz item",
+                extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+            )
+        yield item
+        count += 1
+        if count >= num_q:
+            break
+    logger.info(
+        "quiz stream done",
+        extra={"items": count, "duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+    )
+
+
+async def generate_quiz_with_gemini(summary: str, num_q: int = 5, style: str = "mcq") -> List[Dict]:
+    """
+    Generate MCQs with Gemini. Always returns:
+      [{"question": str, "choices": [str,str,str,str], "answer_index": int}, ...]
+    """
+    items = [it async for it in stream_quiz_with_gemini(summary, num_q, style)]
     return _validate_items(items, num_q)
@@ -0,0 +1,110 @@
+# app/services/store.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from ..core.config import settings
+
+# Documents are addressed by the SHA-256 of the uploaded PDF bytes.
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def document_hash(data: bytes) -> str:
+    """Content address for an uploaded PDF."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_document_hash(value: str) -> bool:
+    return bool(_HASH_RE.match(value or ""))
+
+
+def _doc_dir(doc_hash: str) -> str:
+    if not is_document_hash(doc_hash):
+        raise ValueError(f"Invalid document id: {doc_hash!r}")
+    return os.path.join(settings.DOCUMENT_STORE_DIR, doc_hash)
+
+
+def save_result(doc_hash: str, kind: str, payload: Dict[str, Any]) -> None:
+    """Persist a JSON result (e.g. "summary", "study") for a document.
+
+    Written to a temp file and renamed so readers never see a partial file.
+    """
+    d = _doc_dir(doc_hash)
+    os.makedirs(d, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=d, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(d, f"{kind}.json"))
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+        raise
+
+
+def load_result(doc_hash: str, kind: str) -> Optional[Dict[str, Any]]:
+    """Return a stored result, or None if it was never produced."""
+    path = os.path.join(_doc_dir(doc_hash), f"{kind}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+# --- Per-page text cache -----------------------------------------------------
+# One SQLite file for all documents; page text is zlib-compressed.
+@contextmanager
+def _pages_db() -> Iterator[sqlite3.Connection]:
+    os.makedirs(settings.DOCUMENT_STORE_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(settings.DOCUMENT_STORE_DIR, "pages.sqlite"), timeout=10)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " doc TEXT NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL,"
+            " PRIMARY KEY (doc, page)) WITHOUT ROWID"
+        )
+        with conn:  # commit on success, roll back on error
+            yield conn
+    finally:
+        conn.close()
+
+
+def load_pages(doc_hash: str, pages: Iterable[int]) -> Dict[int, str]:
+    """Cached text for the given 0-based page indices (missing pages are omitted)."""
+    wanted = list(pages)
+    if not wanted:
+        return {}
+    out: Dict[int, str] = {}
+    with _pages_db() as conn:
+        # stay under SQLite's bound-parameter limit
+        for i in range(0, len(wanted), 500):
+            batch = wanted[i:i + 500]
+            rows = conn.execute(
+                f"SELECT page, text FROM pages WHERE doc = ? AND page IN ({','.join('?' * len(batch))})",
+                (doc_hash, *batch),
+            )
+            for page, blob in rows:
+                out[page] = zlib.decompress(blob).decode("utf-8")
+    return out
+
+
+def save_pages(doc_hash: str, pages: Dict[int, str]) -> None:
+    if not pages:
+        return
+    with _pages_db() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO pages (doc, page, text) VALUES (?, ?, ?)",
+            [(doc_hash, i, zlib.compress(t.encode("utf-8"))) for i, t in pages.items()],
+        )
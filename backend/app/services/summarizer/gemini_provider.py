@@ -2,12 +2,34 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import re
+import time
 from typing import List
 
 import google.generativeai as genai
+from google.api_core import exceptions as gexc
 from ...core.config import settings
 
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_CODES = {429, 500, 502, 503, 504}
+_RETRYABLE_TYPES = (
+    gexc.TooManyRequests,
+    gexc.ResourceExhausted,
+    gexc.ServerError,
+    gexc.DeadlineExceeded,
+    TimeoutError,
+)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """429 / 5xx / timeouts, decided from the exception type or its HTTP code only."""
+    if isinstance(exc, _RETRYABLE_TYPES):
+        return True
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and code in _RETRYABLE_CODES
+
 
 SYSTEM_SUMMARY_PROMPT = (
     "You are a study assistant. Produce ONLY GitHub-flavored Markdown.\n"
@@ -61,9 +83,21 @@ class GeminiSummarizer:
     async def _gen_async(self, prompt: str):
         """Run the sync SDK in a worker thread so our FastAPI route can stay async."""
         def _call():
-            return self._model.generate_content(prompt)
+            start = time.perf_counter()
+            resp = self._model.generate_content(prompt)
+            logger.debug(
+                "gemini call done",
+                extra={"prompt_chars": len(prompt),
+                       "duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+            )
+            return resp
         return await asyncio.to_thread(_call)
 
+    def requests_for(self, chunks: List[str]) -> int:
+        """API requests summarize() makes: one per non-empty chunk plus the merge."""
+        n = sum(1 for c in (chunks or []) if c and c.strip())
+        return n + 1 if n else 0
+
     async def summarize(self, chunks: List[str], target_tokens: int) -> str:
         """
         Summarize many chunks:
@@ -83,18 +117,31 @@ class GeminiSummarizer:
                 f"CHUNK {i}/{n}:\n{chunk}"
             )
 
+        start = time.perf_counter()
         tasks = [self._gen_async(p) for p in per_chunk_prompts]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         partials: List[str] = []
-        for r in results:
+        for i, r in enumerate(results, start=1):
             if isinstance(r, Exception):
+                logger.warning("chunk %d/%d failed: %s", i, n, r)
                 continue
             partials.append(_post_clean(getattr(r, "text", "") or ""))
+        logger.info(
+            "summary fan-out done",
+            extra={"chunks": n, "failed": n - len(partials),
+                   "duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+        )
 
-        # Fallback if every chunk failed
+        # A chunk lost to 429/5xx would silently drop part of the document:
+        # surface it so the router can move the whole call to another provider.
+        # Other failures (e.g. a blocked chunk) are skipped, unless every chunk failed.
+        errors = [r for r in results if isinstance(r, Exception)]
+        retryable = next((e for e in errors if _is_retryable(e)), None)
+        if retryable is not None:
+            raise retryable
         if not partials:
-            return ""
+            raise errors[0]
 
         # 2) merge pass — keep sections consistent, drop duplicates, obey budget
         merge_prompt = (
@@ -1,4 +1,4 @@
-# app/services/summarizer/gemini_provider.py
+# app/services/summarizer/git_provider.py
 from __future__ import annotations
 from typing import List
 import asyncio
@@ -11,11 +11,16 @@ SYSTEM_SUMMARY_PROMPT = (
     "Focus on key definitions, distinctions, and examples. Avoid fluff."
 )
 
-class GeminiSummarizer:
+class GeminiSinglePassSummarizer:
+    """One call over the concatenated chunks (no fan-out / merge)."""
+
     def __init__(self, api_key: str, model: str = "gemini-1.5-flash"):
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model)
 
+    def requests_for(self, chunks: List[str]) -> int:
+        return 1
+
     async def summarize(self, chunks: List[str], target_tokens: int) -> str:
         # Gemini SDK is sync; wrap in a thread to keep FastAPI endpoint async
         text = "\n\n".join(chunks)
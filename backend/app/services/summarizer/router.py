@@ -0,0 +1,188 @@
+# app/services/summarizer/router.py
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from google.api_core import exceptions as gexc
+
+from ...core.config import settings
+from .gemini_provider import GeminiSummarizer, _is_retryable
+from .git_provider import GeminiSinglePassSummarizer
+
+logger = logging.getLogger(__name__)
+
+# Provider kinds accepted in SUMMARY_PROVIDERS ("kind:model[@rpm]")
+_KINDS = {
+    "gemini": GeminiSummarizer,
+    "gemini-single": GeminiSinglePassSummarizer,
+}
+
+# Error-rate EWMA halves every this many seconds without new samples
+_ERROR_HALF_LIFE = 60.0
+# A ready provider not picked for this long is tried first once, to re-measure it
+_PROBE_INTERVAL = 120.0
+
+
+class _Route:
+    """One configured provider plus its live stats."""
+
+    def __init__(self, name: str, provider, rpm: int):
+        self.name = name
+        self.provider = provider
+        self.rpm = rpm                      # 0 = no local quota
+        self.latency: Optional[float] = None  # EWMA seconds, None until first success
+        self.error_rate = 0.0               # EWMA of failures (0..1), as of error_at
+        self.error_at = 0.0                 # when error_rate was last updated
+        self.last_used = 0.0                # monotonic time of the last attempt
+        self.cooldown_until = 0.0           # set after a 429
+        self.recent: Deque[float] = deque() # one start time per provider request, last minute
+        self.calls = 0
+        self.errors = 0
+        self.failovers = 0                  # times we moved on from this provider
+
+    def cost(self, chunks: List[str]) -> int:
+        # API requests one summarize() call makes (fan-out providers make one per chunk + a merge)
+        requests_for = getattr(self.provider, "requests_for", None)
+        return requests_for(chunks) if requests_for is not None else 1
+
+    def within_quota(self, now: float, cost: int = 0) -> bool:
+        while self.recent and now - self.recent[0] > 60.0:
+            self.recent.popleft()
+        return not self.rpm or len(self.recent) + cost <= self.rpm
+
+    def current_error_rate(self, now: float) -> float:
+        # Decays with time, so an old failure stops counting even if the route isn't picked
+        return self.error_rate * 0.5 ** ((now - self.error_at) / _ERROR_HALF_LIFE)
+
+    def record(self, now: float, failed: bool, alpha: float) -> None:
+        self.error_rate = (1 - alpha) * self.current_error_rate(now) + (alpha if failed else 0.0)
+        self.error_at = now
+
+    def score(self, default_latency: float, now: float) -> float:
+        # Lower is better: expected latency inflated by recent error rate, plus a flat
+        # penalty so a provider that only ever failed doesn't look "untried and fast"
+        latency = self.latency if self.latency is not None else default_latency
+        err = self.current_error_rate(now)
+        return latency * (1.0 + 4.0 * err) + 30.0 * err
+
+
+class SummaryRouter:
+    """
+    Sends each summarize() call to the best-scoring provider that is within
+    its per-minute quota (counted in API requests, not summarize() calls) and
+    not cooling down after a 429, and fails over to
+    the next one on 429/5xx. Error rates decay with time and an idle provider
+    is probed every _PROBE_INTERVAL, so a demoted one can win back traffic.
+    Same interface as GeminiSummarizer.
+    """
+
+    def __init__(self, routes: List[_Route], alpha: float = 0.3, cooldown: float = 30.0):
+        if not routes:
+            raise ValueError("SummaryRouter needs at least one provider")
+        self.routes = routes
+        self.alpha = alpha
+        self.cooldown = cooldown
+
+    def _ranked(self, now: float, chunks: List[str]) -> List[_Route]:
+        # Untried providers score 0, so each one gets sampled once before scores settle
+        default = 0.0
+        ready = [r for r in self.routes if r.cooldown_until <= now and r.within_quota(now, r.cost(chunks))]
+        held = [r for r in self.routes if r not in ready]
+        # Providers over quota / cooling down are a last resort, not excluded
+        ready.sort(key=lambda r: r.score(default, now))
+        # Probe: a demoted provider idle for _PROBE_INTERVAL goes first once
+        stale = [r for r in ready[1:] if now - r.last_used > _PROBE_INTERVAL]
+        if stale:
+            probe = min(stale, key=lambda r: r.last_used)
+            ready.remove(probe)
+            ready.insert(0, probe)
+        return ready + sorted(held, key=lambda r: r.cooldown_until)
+
+    async def summarize(self, chunks: List[str], target_tokens: int) -> str:
+        now = time.monotonic()
+        order = self._ranked(now, chunks)
+        last_exc: Optional[Exception] = None
+
+        for i, route in enumerate(order):
+            start = time.monotonic()
+            route.recent.extend([start] * route.cost(chunks))
+            route.last_used = start
+            route.calls += 1
+            try:
+                result = await route.provider.summarize(chunks, target_tokens)
+            except Exception as e:
+                elapsed = time.monotonic() - start
+                route.errors += 1
+                route.record(time.monotonic(), True, self.alpha)
+                if isinstance(e, gexc.TooManyRequests) or getattr(e, "code", None) == 429:
+                    route.cooldown_until = time.monotonic() + self.cooldown
+                last_exc = e
+                if _is_retryable(e) and i + 1 < len(order):
+                    route.failovers += 1
+                    logger.warning(
+                        "provider failover",
+                        extra={"provider": route.name, "next": order[i + 1].name,
+                               "error": str(e)[:200], "duration_ms": round(elapsed * 1000, 1)},
+                    )
+                    continue
+                raise
+
+            elapsed = time.monotonic() - start
+            route.record(time.monotonic(), False, self.alpha)
+            route.latency = elapsed if route.latency is None else (
+                (1 - self.alpha) * route.latency + self.alpha * elapsed
+            )
+            logger.info(
+                "provider routed",
+                extra={"provider": route.name, "attempt": i + 1,
+                       "duration_ms": round(elapsed * 1000, 1)},
+            )
+            return result
+
+        raise last_exc  # type: ignore[misc]
+
+    def metrics(self) -> Dict:
+        now = time.monotonic()
+        for r in self.routes:
+            r.within_quota(now)  # prunes timestamps older than a minute
+        return {
+            "providers": [
+                {
+                    "name": r.name,
+                    "calls": r.calls,
+                    "errors": r.errors,
+                    "failovers": r.failovers,
+                    "ewma_latency_ms": None if r.latency is None else round(r.latency * 1000, 1),
+                    "error_rate": round(r.current_error_rate(now), 3),
+                    "rpm_limit": r.rpm,
+                    "requests_last_minute": len(r.recent),
+                    "cooling_down": r.cooldown_until > now,
+                }
+                for r in self.routes
+            ]
+        }
+
+
+def build_summary_router() -> SummaryRouter:
+    """
+    Build routes from SUMMARY_PROVIDERS, e.g.
+      "gemini:gemini-1.5-flash@15,gemini:gemini-1.5-pro@2,gemini-single:gemini-1.5-flash"
+    Empty → a single GeminiSummarizer on GEMINI_MODEL (the previous behaviour).
+    """
+    spec = settings.SUMMARY_PROVIDERS.strip() or f"gemini:{settings.GEMINI_MODEL}"
+    routes: List[_Route] = []
+    for entry in (e.strip() for e in spec.split(",")):
+        if not entry:
+            continue
+        kind, _, rest = entry.partition(":")
+        model, _, rpm = rest.partition("@")
+        cls = _KINDS.get(kind.strip())
+        if cls is None:
+            raise RuntimeError(f"Unknown summary provider kind: {kind!r} (expected one of {sorted(_KINDS)})")
+        model = model.strip() or settings.GEMINI_MODEL
+        provider = cls(api_key=settings.GEMINI_API_KEY, model=model)
+        routes.append(_Route(f"{kind.strip()}:{model}", provider, int(rpm) if rpm.strip() else 0))
+    return SummaryRouter(routes)
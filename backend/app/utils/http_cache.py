@@ -0,0 +1,94 @@
+# app/utils/http_cache.py
+import gzip
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# brotli ships in requirements.txt; still fall back to gzip-only if it is missing
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+
+def _encode_json(payload: Any) -> bytes:
+    # Stable serialization so identical payloads always get identical ETags
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _pick_encoding(accept_encoding: str) -> Optional[str]:
+    offered = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _etag_matches(if_none_match: str, base_tag: str) -> bool:
+    # If-None-Match uses weak comparison; accept any encoded variant of the same body
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == base_tag or tag.startswith(base_tag + "-"):
+            return True
+    return False
+
+
+def cached_json_response(
+    request: Request,
+    payload: Any,
+    *,
+    max_age: int,
+    min_compress_size: int = 500,
+) -> Response:
+    """
+    JSON response with a strong ETag, Cache-Control, 304 on If-None-Match
+    and gzip/brotli content negotiation.
+    """
+    body = _encode_json(payload)
+    base_tag = hashlib.sha256(body).hexdigest()[:32]
+
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""))
+    if len(body) < min_compress_size:
+        encoding = None
+
+    # Each representation gets its own strong validator
+    etag = f'"{base_tag}-{encoding}"' if encoding else f'"{base_tag}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+
+    if _etag_matches(request.headers.get("if-none-match", ""), base_tag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding == "br":
+        body = brotli.compress(body)
+        headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        # mtime=0: identical bytes on every response, as the strong ETag promises
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)